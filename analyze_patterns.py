@@ -1,56 +1,67 @@
-import json
-import statistics
-from collections import defaultdict
-
-def load_cases(filename):
-    with open(filename, 'r') as f:
-        return json.load(f)
-
-def analyze_patterns(cases):
-    # Group by trip duration
-    duration_groups = defaultdict(list)
-    for case in cases:
-        duration = case['input']['trip_duration_days']
-        duration_groups[duration].append(case)
-    
+import numpy as np
+import pandas as pd
+
+from data_io import load_soa
+
+def analyze_patterns(days, miles, receipts, output):
+    # Wrap the case columns in a DataFrame so the grouping and averaging
+    # run in pandas' C groupby instead of Python-level dict-of-lists.
+    df = pd.DataFrame({
+        'duration': days.astype(int),
+        'miles': miles,
+        'receipts': receipts,
+        'output': output,
+    })
+    # Bin in integer space: truncate once to int64, then a single
+    # divide-by-constant kernel, instead of float floor-div plus multiply.
+    df['mile_bin'] = miles.astype(np.int64) // 50 * 50
+    df['receipt_bin'] = receipts.astype(np.int64) // 100 * 100
+    # Safe vectorized divides: zero-denominator rows become NaN and are
+    # excluded from the bin means below instead of raising or skewing
+    # a bin to inf.
+    df['mileage_rate'] = np.divide(
+        output, miles, out=np.full_like(output, np.nan), where=miles > 0)
+    df['receipt_multiplier'] = np.divide(
+        output, receipts, out=np.full_like(output, np.nan), where=receipts > 0)
+
+    # Fuse the three aggregation passes into one traversal of the raw
+    # rows: group once on the full (duration, mile_bin, receipt_bin) key,
+    # then derive the coarser means from the per-cell sums and counts.
+    cells = df.groupby(['duration', 'mile_bin', 'receipt_bin']).agg(
+        n=('output', 'size'),
+        output_sum=('output', 'sum'),
+        rate_sum=('mileage_rate', 'sum'),
+        rate_n=('mileage_rate', 'count'),
+        mult_sum=('receipt_multiplier', 'sum'),
+        mult_n=('receipt_multiplier', 'count'),
+    )
+
+    by_duration = cells.groupby(level='duration')[['n', 'output_sum']].sum()
+    group_sizes = by_duration['n']
+    avg_outputs = by_duration['output_sum'] / by_duration['n']
+
+    by_mile_bin = cells.groupby(level=['duration', 'mile_bin'])[['rate_n', 'rate_sum']].sum()
+    mileage_rates = by_mile_bin['rate_sum'] / by_mile_bin['rate_n']
+
+    by_receipt_bin = cells.groupby(level=['duration', 'receipt_bin'])[['mult_n', 'mult_sum']].sum()
+    receipt_multipliers = by_receipt_bin['mult_sum'] / by_receipt_bin['mult_n']
+
     print("=== Analysis by Trip Duration ===")
-    for duration, group in sorted(duration_groups.items()):
-        avg_output = statistics.mean(c['expected_output'] for c in group)
-        print(f"\nDuration: {duration} days (n={len(group)})")
-        print(f"Average reimbursement: ${avg_output:.2f}")
-        
-        # Analyze mileage patterns
-        mileage_groups = defaultdict(list)
-        for case in group:
-            miles = case['input']['miles_traveled']
-            mileage_groups[miles // 50 * 50].append(case)
-        
+    for duration in avg_outputs.index:
+        print(f"\nDuration: {duration} days (n={group_sizes[duration]})")
+        print(f"Average reimbursement: ${avg_outputs[duration]:.2f}")
+
         print("\nMileage patterns:")
-        for mile_range, mile_cases in sorted(mileage_groups.items()):
-            avg_mileage_rate = statistics.mean(
-                c['expected_output'] / c['input']['miles_traveled']
-                for c in mile_cases
-            )
-            print(f"{mile_range}-{mile_range+49} miles: ${avg_mileage_rate:.2f}/mile")
-        
-        # Analyze receipt patterns
-        receipt_groups = defaultdict(list)
-        for case in group:
-            receipts = case['input']['total_receipts_amount']
-            receipt_groups[receipts // 100 * 100].append(case)
-        
+        for mile_range, rate in mileage_rates[duration].items():
+            print(f"{mile_range}-{mile_range+49} miles: ${rate:.2f}/mile")
+
         print("\nReceipt patterns:")
-        for receipt_range, receipt_cases in sorted(receipt_groups.items()):
-            if receipt_cases:
-                avg_receipt_rate = statistics.mean(
-                    c['expected_output'] / c['input']['total_receipts_amount']
-                    for c in receipt_cases
-                )
-                print(f"${receipt_range}-${receipt_range+99}: {avg_receipt_rate:.2f}x multiplier")
+        for receipt_range, multiplier in receipt_multipliers[duration].items():
+            print(f"${receipt_range}-${receipt_range+99}: {multiplier:.2f}x multiplier")
 
 def main():
-    cases = load_cases('public_cases.json')
-    analyze_patterns(cases)
+    days, miles, receipts, output = load_soa('public_cases.json')
+    analyze_patterns(days, miles, receipts, output)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
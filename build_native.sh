@@ -0,0 +1,11 @@
+#!/bin/bash
+
+# Build the native reimbursement calculator so run.sh can skip Python
+# interpreter startup on every harness invocation.
+# Usage: ./build_native.sh
+
+set -e
+
+cc -O2 -o calculate_reimbursement calculate_reimbursement.c
+
+echo "Built ./calculate_reimbursement"
@@ -0,0 +1,75 @@
+/*
+ * Native build of the reimbursement calculator CLI.
+ *
+ * Mirrors calculate_reimbursement.py (_classify plus the baked-in
+ * _DEFAULT_COEF table) so the evaluation harness can shell out without
+ * paying Python interpreter startup on every case. Build with
+ * ./build_native.sh; run.sh prefers the binary when it exists.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+
+/* Cluster coefficients, same rows as _DEFAULT_COEF:
+ * 0: Long Trips, High Receipts
+ * 1: Short Trips, Low Activity
+ * 2: Mid-Length, High Mileage
+ */
+static const double COEF[3][3] = {
+    {87.111841, 0.673030, 0.285504},
+    {94.201797, 0.462207, 0.253290},
+    {73.582926, 0.506600, 0.462858},
+};
+
+static int classify(double days, double miles, double receipts)
+{
+    if (days >= 5 && days <= 12 && receipts / days >= 100.0)
+        return 0;
+    if (days <= 6 && receipts / days < 100.0)
+        return 1;
+    if (days <= 9 && miles >= 400.0)
+        return 2;
+    return 1;
+}
+
+int main(int argc, char **argv)
+{
+    char *end;
+    long days;
+    double miles, receipts, reimbursement;
+    int cluster;
+
+    if (argc != 4) {
+        fprintf(stderr, "Usage: calculate_reimbursement <days> <miles> <receipts>\n");
+        return 1;
+    }
+
+    days = strtol(argv[1], &end, 10);
+    if (*end != '\0' || end == argv[1]) {
+        fprintf(stderr, "Error: Invalid input format\n");
+        return 1;
+    }
+    miles = strtod(argv[2], &end);
+    if (*end != '\0' || end == argv[2]) {
+        fprintf(stderr, "Error: Invalid input format\n");
+        return 1;
+    }
+    receipts = strtod(argv[3], &end);
+    if (*end != '\0' || end == argv[3]) {
+        fprintf(stderr, "Error: Invalid input format\n");
+        return 1;
+    }
+
+    if (days < 1 || miles < 0 || receipts < 0) {
+        fprintf(stderr, "Error: All inputs must be non-negative, and days must be positive\n");
+        return 1;
+    }
+
+    cluster = classify((double)days, miles, receipts);
+    reimbursement = COEF[cluster][0] * (double)days
+                  + COEF[cluster][1] * miles
+                  + COEF[cluster][2] * receipts;
+
+    printf("%.2f\n", reimbursement);
+    return 0;
+}
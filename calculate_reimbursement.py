@@ -1,67 +1,70 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import math
 
-import numpy as np
+# numpy is imported lazily inside the functions that need it: the scalar
+# CLI path stays numpy-free so per-invocation startup is just the
+# interpreter, which matters when the evaluation harness shells out once
+# per case.
 
-def derive_linear_coefficients(data):
+def derive_linear_coefficients(days, miles, receipts, output):
     """
-    Given a list of dicts with 'input' and 'expected_output',
+    Given the case columns as float64 arrays (see data_io.load_soa),
     solve for coefficients [a, b, c] in:
-    a * days + b * miles + c * receipts = expected_output
+    a * days + b * miles + c * receipts = output
     """
-    A = []
-    y = []
+    import numpy as np
 
-    for entry in data:
-        days = entry["input"]["trip_duration_days"]
-        miles = entry["input"]["miles_traveled"]
-        receipts = entry["input"]["total_receipts_amount"]
-        output = entry["expected_output"]
+    A = np.column_stack((days, miles, receipts))
+    y = output
 
-        A.append([days, miles, receipts])
-        y.append(output)
-
-    A = np.array(A)
-    y = np.array(y)
-
-    # Solve for [a, b, c]
-    coefficients = np.linalg.solve(A, y)
+    # Solve the normal equations A^T A x = A^T y: a cheap 3x3 solve that,
+    # unlike np.linalg.solve on the rectangular A, works for any N.
+    AtA = A.T @ A
+    Aty = A.T @ y
+    if np.linalg.cond(AtA) > 1e12:
+        # Ill-conditioned cluster; fall back to the SVD-based solver
+        return np.linalg.lstsq(A, y, rcond=None)[0]
+    coefficients = np.linalg.solve(AtA, Aty)
     return coefficients
 
 
+# Mileage tiers: 0-100 miles at 40.0/mi, 100-500 at 2.0, 500-1000 at 1.5,
+# over 1000 at 1.0. Each tier's base is the payout accumulated by the
+# tiers below it.
+_MILEAGE_BREAKPOINTS = (100.0, 500.0, 1000.0)
+_MILEAGE_TIER_STARTS = (0.0, 100.0, 500.0, 1000.0)
+_MILEAGE_RATES = (40.0, 2.0, 1.5, 1.0)
+_MILEAGE_BASES = (0.0, 4000.0, 4800.0, 5550.0)
+
 def calculate_mileage_reimbursement(miles):
-    """Calculate mileage reimbursement using a tiered system."""
-    if miles <= 100:
-        # First 100 miles get a much higher rate
-        return miles * 40.0
-    elif miles <= 500:
-        # Next 400 miles get a moderate rate
-        return 4000.0 + (miles - 100) * 2.0
-    elif miles <= 1000:
-        # Next 500 miles get a lower rate
-        return 4800.0 + (miles - 500) * 1.5
-    else:
-        # Miles over 1000 get the lowest rate
-        return 5550.0 + (miles - 1000) * 1.0
+    """
+    Calculate mileage reimbursement using a tiered system.
+    Branchless tier lookup via searchsorted; accepts scalars or arrays.
+    """
+    import numpy as np
+
+    tier = np.searchsorted(_MILEAGE_BREAKPOINTS, miles, side='left')
+    return (np.asarray(_MILEAGE_BASES)[tier]
+            + (miles - np.asarray(_MILEAGE_TIER_STARTS)[tier])
+            * np.asarray(_MILEAGE_RATES)[tier])
 
 def calculate_receipt_multiplier(receipts):
-    """Calculate the multiplier for receipt amounts."""
-    if receipts == 0:
-        return 1.0  # Default multiplier for zero receipts
-    elif receipts < 100:
-        # Very low receipt amounts get high multipliers
-        return 15.0
-    elif receipts < 500:
-        # Medium receipt amounts get moderate multipliers
-        return 3.0
-    elif receipts < 1000:
-        # Higher receipt amounts get lower multipliers
-        return 1.5
-    else:
-        # Very high receipt amounts get diminishing returns
-        return 0.8
+    """
+    Calculate the multiplier for receipt amounts.
+    Branchless bucket selection; accepts scalars or arrays.
+    """
+    import numpy as np
+
+    return np.select(
+        [receipts == 0, receipts < 100, receipts < 500, receipts < 1000],
+        # Zero receipts default to 1.0; low amounts get high multipliers,
+        # tapering to diminishing returns above 1000.
+        [1.0, 15.0, 3.0, 1.5],
+        default=0.8,
+    )
 
 def calculate_base_per_diem(days):
     """Calculate base per diem based on trip duration."""
@@ -82,61 +85,127 @@ def calculate_base_per_diem(days):
         # Longer trips get a slightly higher daily rate
         return 110.0 * days
 
+# Cluster coefficients derived from data analysis (see derive_coefficients.py):
+# row 0: Long Trips, High Receipts
+# row 1: Short Trips, Low Activity
+# row 2: Mid-Length, High Mileage
+_DEFAULT_COEF = (
+    (87.111841, 0.673030, 0.285504),
+    (94.201797, 0.462207, 0.253290),
+    (73.582926, 0.506600, 0.462858),
+)
+
+_COEF = None
+
+def _get_coefficients():
+    """
+    Return the (3, 3) cluster coefficient table, preferring the coef.npy
+    cache written by `derive_coefficients.py --cache` over the baked-in
+    defaults. Loaded lazily and kept for the life of the process; numpy
+    is only imported when the cache file actually exists, so the plain
+    CLI path stays numpy-free.
+    """
+    global _COEF
+    if _COEF is None:
+        coef_path = os.path.join(os.path.dirname(__file__), 'coef.npy')
+        if os.path.exists(coef_path):
+            import numpy as np
+            _COEF = np.load(coef_path)
+        else:
+            _COEF = _DEFAULT_COEF
+    return _COEF
+
+def _classify(days: float, miles: float, receipts: float) -> int:
+    """
+    Pick the coefficient row for one trip:
+    0: Long Trips, High Receipts (5-12 days, high receipts)
+    1: Short Trips, Low Activity (1-6 days, low receipts)
+    2: Mid-Length, High Mileage (1-9 days, high mileage)
+    Unclassified trips fall through to cluster 1, which has the best
+    R-squared (0.9141).
+    """
+    # receipts/days is only needed by the first two cluster probes, so
+    # compute it at most once and only behind their day-range checks.
+    receipts_per_day = None
+    if 5 <= days <= 12:
+        receipts_per_day = receipts / days
+        if receipts_per_day >= 100:
+            return 0
+    if days <= 6:
+        if receipts_per_day is None:
+            receipts_per_day = receipts / days
+        if receipts_per_day < 100:
+            return 1
+    if days <= 9 and miles >= 400:
+        return 2
+    return 1
+
 def calculate_reimbursement(trip_duration_days: float, miles_traveled: float, total_receipts_amount: float) -> float:
     """
-    Calculates reimbursement using cluster-based coefficients derived from data analysis.
-    
-    Cluster 0 (Long Trips, High Receipts):
-    - days_coef: 87.111841
-    - miles_coef: 0.673030
-    - receipts_coef: 0.285504
-    
-    Cluster 1 (Short Trips, Low Activity):
-    - days_coef: 94.201797
-    - miles_coef: 0.462207
-    - receipts_coef: 0.253290
-    
-    Cluster 2 (Mid-Length, High Mileage):
-    - days_coef: 73.582926
-    - miles_coef: 0.506600
-    - receipts_coef: 0.462858
+    Calculates reimbursement using cluster-based coefficients derived from
+    data analysis: classify the trip, then apply that cluster's row from
+    _get_coefficients() (coef.npy cache when present, _DEFAULT_COEF
+    otherwise) as a single linear combination.
     """
-    receipts_per_day = total_receipts_amount / trip_duration_days
-    
-    # Cluster 0: Long Trips, High Receipts (5-12 days, high receipts)
-    if 5 <= trip_duration_days <= 12 and receipts_per_day >= 100:
-        reimbursement = (
-            87.111841 * trip_duration_days +
-            0.673030 * miles_traveled +
-            0.285504 * total_receipts_amount
-        )
-    
-    # Cluster 1: Short Trips, Low Activity (1-6 days, low receipts)
-    elif trip_duration_days <= 6 and receipts_per_day < 100:
-        reimbursement = (
-            94.201797 * trip_duration_days +
-            0.462207 * miles_traveled +
-            0.253290 * total_receipts_amount
-        )
-    
-    # Cluster 2: Mid-Length, High Mileage (1-9 days, high mileage)
-    elif trip_duration_days <= 9 and miles_traveled >= 400:
-        reimbursement = (
-            73.582926 * trip_duration_days +
-            0.506600 * miles_traveled +
-            0.462858 * total_receipts_amount
-        )
-    
-    # Default case: Use Cluster 1 coefficients as they have the best R-squared (0.9141)
-    else:
-        reimbursement = (
-            94.201797 * trip_duration_days +
-            0.462207 * miles_traveled +
-            0.253290 * total_receipts_amount
-        )
-    
+    cluster = _classify(trip_duration_days, miles_traveled, total_receipts_amount)
+
+    days_coef, miles_coef, receipts_coef = _get_coefficients()[cluster]
+    reimbursement = (
+        days_coef * trip_duration_days +
+        miles_coef * miles_traveled +
+        receipts_coef * total_receipts_amount
+    )
+
     return round(reimbursement, 2)
 
+_calc_batch = None
+
+def _get_batch_kernel():
+    """
+    Compile (or fetch the cached) numba kernel for batch scoring.
+    Imported lazily so single-trip CLI calls never pay the numba import.
+    """
+    global _calc_batch
+    if _calc_batch is None:
+        from numba import njit, prange
+
+        @njit('void(float64[:], float64[:], float64[:], float64[:])',
+              cache=True, parallel=True, fastmath=True)
+        def kernel(days, miles, receipts, out):
+            for i in prange(len(days)):
+                d = days[i]
+                m = miles[i]
+                r = receipts[i]
+                # Guard against zero-day rows from bad batch input
+                rpd = r / d if d > 0 else 0.0
+                if 5 <= d <= 12 and rpd >= 100:
+                    out[i] = 87.111841 * d + 0.673030 * m + 0.285504 * r
+                elif d <= 6 and rpd < 100:
+                    out[i] = 94.201797 * d + 0.462207 * m + 0.253290 * r
+                elif d <= 9 and m >= 400:
+                    out[i] = 73.582926 * d + 0.506600 * m + 0.462858 * r
+                else:
+                    out[i] = 94.201797 * d + 0.462207 * m + 0.253290 * r
+
+        _calc_batch = kernel
+    return _calc_batch
+
+def calculate_reimbursement_batch(trip_duration_days, miles_traveled, total_receipts_amount):
+    """
+    Score many trips at once. Takes three float64 arrays and returns the
+    rounded reimbursement array, using the same cluster coefficients as
+    calculate_reimbursement but compiled with numba for batch evaluation.
+    """
+    import numpy as np
+
+    days = np.ascontiguousarray(trip_duration_days, dtype=np.float64)
+    miles = np.ascontiguousarray(miles_traveled, dtype=np.float64)
+    receipts = np.ascontiguousarray(total_receipts_amount, dtype=np.float64)
+
+    out = np.empty(len(days), dtype=np.float64)
+    _get_batch_kernel()(days, miles, receipts, out)
+    return np.round(out, 2)
+
 def main():
     if len(sys.argv) != 4:
         sys.stderr.write("Usage: python3 calculate_reimbursement.py <days> <miles> <receipts>\n")
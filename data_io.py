@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Shared structure-of-arrays loading for the public case files."""
+
+import os
+
+import numpy as np
+import orjson
+
+
+def load_soa(path: str, cache: bool = True):
+    """
+    Load a case file as four contiguous float64 arrays:
+    (days, miles, receipts, output).
+
+    The dense arrays replace the list-of-dicts layout so downstream
+    passes (classification, regression, groupby analysis) run over
+    cache-friendly columns instead of chasing dict pointers. When
+    caching is enabled the arrays are saved next to the JSON as a .npz
+    and reloaded directly while the JSON is unchanged.
+    """
+    cache_path = os.path.splitext(path)[0] + '.npz'
+    if (cache and os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+        with np.load(cache_path) as npz:
+            return npz['days'], npz['miles'], npz['receipts'], npz['output']
+
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+
+    n = len(data)
+    days = np.fromiter(
+        (entry["input"]["trip_duration_days"] for entry in data),
+        dtype=np.float64, count=n
+    )
+    miles = np.fromiter(
+        (entry["input"]["miles_traveled"] for entry in data),
+        dtype=np.float64, count=n
+    )
+    receipts = np.fromiter(
+        (entry["input"]["total_receipts_amount"] for entry in data),
+        dtype=np.float64, count=n
+    )
+    output = np.fromiter(
+        (entry["expected_output"] for entry in data),
+        dtype=np.float64, count=n
+    )
+
+    if cache:
+        np.savez(cache_path, days=days, miles=miles, receipts=receipts,
+                 output=output)
+
+    return days, miles, receipts, output
@@ -1,78 +1,84 @@
 #!/usr/bin/env python3
 
-import json
+import sys
+
 import numpy as np
-from typing import List, Dict, Any
+from typing import Dict
 
-def load_data(file_path: str) -> List[Dict[str, Any]]:
-    """Load and parse the JSON data file."""
-    with open(file_path, 'r') as f:
-        return json.load(f)
+from data_io import load_soa
 
-def classify_trip(entry: Dict[str, Any]) -> int:
+def classify_all(days: np.ndarray, miles: np.ndarray, receipts: np.ndarray) -> np.ndarray:
     """
-    Classify a trip into one of three clusters:
-    0: Long Trips, High Receipts
-    1: Short Trips, Low Activity
-    2: Mid-Length, High Mileage
+    Classify every trip in one pass using boolean masks:
+    0: Long Trips, High Receipts (5-12 days, high receipts)
+    1: Short Trips, Low Activity (1-6 days, low receipts)
+    2: Mid-Length, High Mileage (1-9 days, high mileage)
+    Returns an int8 array of cluster labels (-1 for unclassified).
     """
-    days = entry["input"]["trip_duration_days"]
-    miles = entry["input"]["miles_traveled"]
-    receipts = entry["input"]["total_receipts_amount"]
     receipts_per_day = receipts / days
 
-    if 5 <= days <= 12 and receipts_per_day >= 100:
-        return 0  # Long Trips, High Receipts
-    elif days <= 6 and receipts_per_day < 100:
-        return 1  # Short Trips, Low Activity
-    elif days <= 9 and miles >= 400:
-        return 2  # Mid-Length, High Mileage
-    else:
-        return -1  # Unclassified
+    c0 = (days >= 5) & (days <= 12) & (receipts_per_day >= 100)
+    c1 = ~c0 & (days <= 6) & (receipts_per_day < 100)
+    c2 = ~c0 & ~c1 & (days <= 9) & (miles >= 400)
+
+    labels = np.full(len(days), -1, dtype=np.int8)
+    labels[c0] = 0
+    labels[c1] = 1
+    labels[c2] = 2
+    return labels
+
+def predict_all(days: np.ndarray, miles: np.ndarray, receipts: np.ndarray,
+                coef_table: np.ndarray) -> np.ndarray:
+    """
+    Predict reimbursements for the whole dataset in one pass: gather each
+    trip's cluster row from the coefficient table and take the batched dot
+    product with (days, miles, receipts) via einsum. Unclassified trips
+    use cluster 1, matching the calculator's default.
+    """
+    labels = classify_all(days, miles, receipts)
+    labels = np.where(labels == -1, 1, labels)
+    X = np.column_stack((days, miles, receipts))
+    return np.einsum('nk,nk->n', X, coef_table[labels])
 
-def derive_linear_coefficients(data: List[Dict[str, Any]]) -> Dict[int, tuple]:
+def derive_linear_coefficients(days: np.ndarray, miles: np.ndarray,
+                               receipts: np.ndarray,
+                               outputs: np.ndarray) -> Dict[int, tuple]:
     """
     Derive linear coefficients for each cluster using least squares regression.
+    Takes the case columns as float64 arrays (see data_io.load_soa).
     Returns a dictionary mapping cluster number to (coefficients, residuals, y_values).
     """
-    # Group data by cluster
-    clusters = {0: [], 1: [], 2: []}
-    
-    for entry in data:
-        cluster = classify_trip(entry)
-        if cluster != -1:
-            clusters[cluster].append(entry)
-    
-    # Calculate coefficients for each cluster
+    A_all = np.column_stack((days, miles, receipts))
+    labels = classify_all(days, miles, receipts)
+
+    # Calculate coefficients for each cluster via boolean mask selection
     coefficients = {}
-    for cluster, cluster_data in clusters.items():
-        if not cluster_data:
+    for cluster in (0, 1, 2):
+        mask = labels == cluster
+        if not mask.any():
             continue
-            
-        A = []
-        y = []
-        
-        for entry in cluster_data:
-            days = entry["input"]["trip_duration_days"]
-            miles = entry["input"]["miles_traveled"]
-            receipts = entry["input"]["total_receipts_amount"]
-            output = entry["expected_output"]
-            
-            A.append([days, miles, receipts])
-            y.append(output)
-        
-        A = np.array(A)
-        y = np.array(y)
-        
+
+        A = A_all[mask]
+        y = outputs[mask]
+
         try:
-            # Use least squares regression instead of exact solving
-            coef, residuals, rank, s = np.linalg.lstsq(A, y, rcond=None)
-            coefficients[cluster] = (coef, residuals[0], y)
-            
+            # Solve the normal equations (3x3) instead of running lstsq's
+            # full SVD on the N x 3 matrix; fall back to lstsq only when
+            # the cluster is too ill-conditioned for the closed form.
+            AtA = A.T @ A
+            Aty = A.T @ y
+            if np.linalg.cond(AtA) > 1e12:
+                coef = np.linalg.lstsq(A, y, rcond=None)[0]
+            else:
+                coef = np.linalg.solve(AtA, Aty)
+            rank = np.linalg.matrix_rank(AtA)
+            residual = float(np.sum((A @ coef - y) ** 2))
+            coefficients[cluster] = (coef, residual, y)
+
             # Print some statistics about the fit
             print(f"\nCluster {cluster} Statistics:")
-            print(f"Number of samples: {len(cluster_data)}")
-            print(f"Residuals: {residuals[0]:.2f}")
+            print(f"Number of samples: {int(mask.sum())}")
+            print(f"Residuals: {residual:.2f}")
             print(f"Rank: {rank}")
             
         except np.linalg.LinAlgError as e:
@@ -109,14 +115,28 @@ def print_coefficients(coefficients: Dict[int, tuple]):
         print(f"Root Mean Square Error: {mae:.2f}")
 
 def main():
-    # Load the data
-    data = load_data('public_cases.json')
-    
+    # Load the data as column arrays
+    days, miles, receipts, outputs = load_soa('public_cases.json')
+
     # Derive coefficients for each cluster
-    coefficients = derive_linear_coefficients(data)
+    coefficients = derive_linear_coefficients(days, miles, receipts, outputs)
     
     # Print the results
     print_coefficients(coefficients)
 
+    # Score every case in one vectorized pass to report the overall fit
+    coef_table = np.stack([coefficients[k][0] for k in (0, 1, 2)])
+    predictions = predict_all(days, miles, receipts, coef_table)
+    mae = np.mean(np.abs(predictions - outputs))
+    print(f"\nFull-dataset mean absolute error: {mae:.2f}")
+
+    # With --cache, persist the solved coefficients so the calculator can
+    # load them instead of relying on its baked-in copies. Round to the
+    # 6 decimals the baked-in tables carry so the cached, default and
+    # native-binary paths all score identically.
+    if '--cache' in sys.argv[1:]:
+        np.save('coef.npy', np.round(coef_table, 6))
+        print("Saved coefficient table to coef.npy")
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
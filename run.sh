@@ -4,9 +4,11 @@
 # This script takes three parameters and outputs the reimbursement amount
 # Usage: ./run.sh <trip_duration_days> <miles_traveled> <total_receipts_amount>
 
-# Make sure the Python script is executable
-chmod +x calculate_reimbursement.py
-
-# Run the Python implementation and capture only the numeric output
-python3 calculate_reimbursement.py "$1" "$2" "$3" 2>&1
-
+# Prefer the native build (see build_native.sh), which skips Python
+# interpreter startup on every invocation; fall back to the Python
+# implementation when it hasn't been built.
+if [ -x "./calculate_reimbursement" ]; then
+    ./calculate_reimbursement "$1" "$2" "$3" 2>&1
+else
+    python3 calculate_reimbursement.py "$1" "$2" "$3" 2>&1
+fi